@@ -1,22 +1,91 @@
 #!/usr/bin/env python3
 import sys
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import subprocess
-import json
+import shutil
 import argparse
-import pandas as pd
+import xlsxwriter
+import orjson
 import os
-from urllib.parse import urlparse
-from time import sleep
-import yaml
+import re
+import math
+import hashlib
+import threading
+import queue
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from functools import partial
+from urllib.parse import urlparse, parse_qs
+from time import sleep, time, monotonic
 
 YELLOW = "\033[93m"
 RESET = "\033[0m"
+DEFAULT_JOBS = min(8, os.cpu_count() or 1)
+PROFILE_WORKERS = 10
+GITHUB_CONCURRENCY = 10
+PAGE_WORKERS = 8
+DOCKERHUB_PAGE_SIZE = 100
+TAG_WORKERS = 6
+TAG_QUEUE_SIZE = 32
+DOCKER_RATE = 2
+DOCKER_BURST = 4
+SKIP_TAG_SUFFIXES = (".sig", ".enc")
+_EMPTY = {}  # shared read-only default for missing finding sections
+RATE_LIMIT_FLOOR = 10
+WRITE_QUEUE_SIZE = 1024
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "trufflex")
+CACHE_TTL = 600
+ASYNC_CONCURRENCY = 16
+
+_SESSION = requests.Session()
+_SESSION.mount('https://', HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=16,
+    max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=(500, 502, 503, 504), raise_on_status=False),
+))
+_SESSION.headers.update({'User-Agent': 'trufflex', 'Accept-Encoding': 'gzip, deflate'})
+# Caps in-flight GitHub requests across the nested listing and page pools
+_GITHUB_SLOTS = threading.BoundedSemaphore(GITHUB_CONCURRENCY)
 
 # ------------------------
 # Utility functions
 # ------------------------
 
+def _conf_value(value):
+    """Unquote a cred.conf value, or drop a trailing ` # comment` from an unquoted one"""
+    value = value.strip()
+    if value[:1] in ("'", '"'):
+        end = value.find(value[0], 1)
+        if end != -1:
+            return value[1:end]
+    return re.split(r"\s+#", value, maxsplit=1)[0]
+
+def parse_credentials(lines):
+    """Parse cred.conf's `key:` + `- value` lists (or inline `key: value`) into {key: [values]}"""
+    conf = {}
+    key = None
+    for lineno, raw in enumerate(lines, 1):
+        line = raw.strip()
+        if not line or line.startswith("#"):
+            continue
+        if line.startswith("-"):
+            if key is None:
+                raise ValueError(f"line {lineno}: '- value' before any 'key:'")
+            value = line[1:]
+        elif ":" in line:
+            key, value = line.split(":", 1)
+            key = key.strip()
+            conf.setdefault(key, [])
+        else:
+            raise ValueError(f"line {lineno}: expected 'key:' or '- value'")
+        value = _conf_value(value)
+        if value:
+            conf[key].append(value)
+    return conf
+
 def read_credentials():
     """Read GitHub token and Docker credentials from cred.conf"""
     if not os.path.exists("cred.conf"):
@@ -24,8 +93,8 @@ def read_credentials():
         sys.exit(1)
     with open("cred.conf", "r") as f:
         try:
-            conf = yaml.safe_load(f)
-        except yaml.YAMLError as e:
+            conf = parse_credentials(f)
+        except ValueError as e:
             print(f"Error parsing cred.conf: {e}")
             sys.exit(1)
     github_token = None
@@ -41,73 +110,428 @@ def read_credentials():
         docker_user, docker_pass = line.split(":", 1)
     return github_token, docker_user, docker_pass
 
-def run_trufflehog(cmd):
-    """Run a trufflehog command and capture output"""
+def _cache_path(url, headers=None, params=None):
+    auth = (headers or {}).get('Authorization', '')
+    key = f"{url}|{sorted((params or {}).items())}|{auth}"
+    return os.path.join(CACHE_DIR, hashlib.sha256(key.encode()).hexdigest() + ".json")
+
+class TokenBucket:
+    """Thread-safe limiter allowing rate acquisitions per second, with bursts up to burst"""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = burst
+        self.updated = monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        with self.lock:
+            now = monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            wait = (1 - self.tokens) / self.rate if self.tokens < 1 else 0
+            self.tokens -= 1
+        if wait > 0:
+            sleep(wait)
+
+def _rate_limit_header(headers, name):
+    value = headers.get(name)
+    if value is None:
+        return None
+    try:
+        return int(float(value.split(';', 1)[0]))
+    except (ValueError, OverflowError):
+        return None
+
+def _rate_limit_wait(headers):
+    """Seconds to wait for the rate limit window to reset when few requests remain"""
+    remaining = _rate_limit_header(headers, 'X-RateLimit-Remaining')
+    if remaining is not None:
+        # GitHub / Docker Hub style: X-RateLimit-Reset is an epoch timestamp
+        reset = _rate_limit_header(headers, 'X-RateLimit-Reset')
+        wait = None if reset is None else reset - time()
+    else:
+        # IETF style: RateLimit-Reset is delta-seconds
+        remaining = _rate_limit_header(headers, 'RateLimit-Remaining')
+        wait = _rate_limit_header(headers, 'RateLimit-Reset')
+    if remaining is None or wait is None or remaining >= RATE_LIMIT_FLOOR or wait <= 0:
+        return 0
+    print(f"{YELLOW}Rate limit nearly exhausted ({remaining} left), sleeping {int(wait)}s{RESET}")
+    return wait
+
+def _respect_rate_limit(r):
+    """Sleep until the rate limit window resets when few requests remain"""
+    wait = _rate_limit_wait(r.headers)
+    if wait:
+        sleep(wait)
+
+def _cache_load(path, ttl):
+    """Return (entry, fresh) for a cache file, or (None, False) if it is missing, unreadable or malformed"""
+    if ttl <= 0:
+        return None, False
+    try:
+        with open(path, "rb") as f:
+            entry = orjson.loads(f.read())
+        if "data" not in entry or not isinstance(entry["links"], dict) or not isinstance(entry.get("etag") or "", str):
+            return None, False
+        return entry, os.path.getmtime(path) > time() - ttl
+    except (OSError, orjson.JSONDecodeError, KeyError, TypeError):
+        return None, False
+
+def _cache_store(path, data, links, etag):
+    """Best-effort cache write; a failure only costs the next run a refetch"""
+    tmp = f"{path}.{threading.get_ident()}.tmp"
     try:
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        return result.stdout + result.stderr
-    except FileNotFoundError:
+        # Listings can include private repos and orgs for the token, so keep them owner-only
+        os.makedirs(CACHE_DIR, mode=0o700, exist_ok=True)
+        os.chmod(CACHE_DIR, 0o700)
+        with os.fdopen(os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "wb") as f:
+            f.write(orjson.dumps({"data": data, "links": links, "etag": etag}))
+        os.replace(tmp, path)
+    except OSError:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+
+def _cache_touch(path):
+    """Best-effort mtime refresh after a 304 revalidation"""
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+def _cached_get(url, headers=None, params=None, ttl=CACHE_TTL):
+    """GET a JSON endpoint through the on-disk cache, revalidating stale entries by ETag"""
+    path = _cache_path(url, headers, params)
+    entry, fresh = _cache_load(path, ttl)
+    if fresh:
+        return 200, entry["data"], entry["links"]
+    headers = dict(headers or {})
+    if entry and entry.get("etag"):
+        headers['If-None-Match'] = entry["etag"]
+    with _GITHUB_SLOTS:
+        r = _SESSION.get(url, headers=headers, params=params)
+    _respect_rate_limit(r)
+    if r.status_code == 304 and entry:
+        _cache_touch(path)
+        return 200, entry["data"], entry["links"]
+    if r.status_code != 200:
+        return r.status_code, None, {}
+    data = r.json()
+    if ttl > 0:
+        _cache_store(path, data, r.links, r.headers.get('ETag'))
+    return 200, data, r.links
+
+def _writer_thread(q, path, errors):
+    """Drain raw output chunks from q into path until a None sentinel, recording failures in errors"""
+    fd = None
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    except OSError as e:
+        errors.append(e)
+    # Keep draining after a failure so scan workers never block on a full queue
+    while (chunk := q.get()) is not None:
+        if errors:
+            continue
+        try:
+            view = memoryview(chunk)
+            while view:
+                view = view[os.write(fd, view):]
+        except Exception as e:
+            errors.append(e)
+    if fd is not None:
+        os.close(fd)
+
+def require_trufflehog():
+    """Exit before starting a scan pool when the trufflehog binary is missing"""
+    if shutil.which("trufflehog") is None:
         print("Error: trufflehog not found. Install it with: pip install trufflehog")
         sys.exit(1)
 
+def run_trufflehog(cmd, out_q, rows):
+    """Stream a trufflehog command's output onto out_q, collecting parsed findings into rows"""
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    with proc.stdout:
+        for line in proc.stdout:
+            if not line.strip():
+                continue
+            out_q.put(line)
+            try:
+                rows.append(parse_github_finding(orjson.loads(line)))
+            except orjson.JSONDecodeError:
+                continue
+    proc.wait()
+
+def run_trufflehog_pool(jobs, workers=DEFAULT_JOBS, results_file="results.txt"):
+    """Run (label, cmd) trufflehog jobs in a thread pool, streaming output to results_file"""
+    rows = []
+    if not jobs:
+        return rows
+    require_trufflehog()
+    out_q = queue.Queue(maxsize=WRITE_QUEUE_SIZE)
+    write_errors = []
+    writer = threading.Thread(target=_writer_thread, args=(out_q, results_file, write_errors), daemon=True)
+    writer.start()
+
+    def worker(job):
+        label, cmd = job
+        print(f"Scanning {label}")
+        run_trufflehog(cmd, out_q, rows)
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as ex:
+            list(ex.map(worker, jobs))
+    finally:
+        out_q.put(None)
+        writer.join()
+    if write_errors:
+        raise write_errors[0]
+    return rows
+
+def github_repo_jobs(repos, token=None, batch_size=1):
+    """Build trufflehog jobs for repos, passing up to batch_size --repo flags per process"""
+    jobs = []
+    for i in range(0, len(repos), batch_size):
+        batch = repos[i:i + batch_size]
+        cmd = ['trufflehog', 'github'] + [f'--repo={repo}' for repo in batch]
+        if token:
+            cmd.append(f'--token={token}')
+        cmd.append('--json')
+        jobs.append((f"repository: {', '.join(batch)}", cmd))
+    return jobs
+
+# ------------------------
+# Async HTTP (--async)
+# ------------------------
+
+def _aiohttp():
+    try:
+        import aiohttp
+    except ImportError:
+        print("Error: --async requires aiohttp. Install it with: pip install aiohttp")
+        sys.exit(1)
+    return aiohttp
+
+def _async_session():
+    aiohttp = _aiohttp()
+    return aiohttp.ClientSession(
+        headers=dict(_SESSION.headers),
+        connector=aiohttp.TCPConnector(limit=ASYNC_CONCURRENCY),
+    )
+
+async def _async_cached_get(session, sem, url, headers=None, params=None, ttl=CACHE_TTL):
+    """Async counterpart of _cached_get sharing the same on-disk cache"""
+    path = _cache_path(url, headers, params)
+    entry, fresh = _cache_load(path, ttl)
+    if fresh:
+        return 200, entry["data"], entry["links"]
+    headers = dict(headers or {})
+    if entry and entry.get("etag"):
+        headers['If-None-Match'] = entry["etag"]
+    async with sem:
+        async with session.get(url, headers=headers, params=params) as r:
+            wait = _rate_limit_wait(r.headers)
+            status = r.status
+            data = await r.json() if status == 200 else None
+            links = {rel: {'url': str(link['url'])} for rel, link in r.links.items()}
+            etag = r.headers.get('ETag')
+        if wait:
+            await asyncio.sleep(wait)
+    if status == 304 and entry:
+        _cache_touch(path)
+        return 200, entry["data"], entry["links"]
+    if status != 200:
+        return status, None, {}
+    if ttl > 0:
+        _cache_store(path, data, links, etag)
+    return 200, data, links
+
+async def fetch_all_pages(session, sem, url, headers=None, params=None, ttl=CACHE_TTL):
+    """Async counterpart of get_all_pages"""
+    params = dict(params or {})
+    status, data, links = await _async_cached_get(session, sem, url, headers, params, ttl)
+    if status != 200:
+        return status, []
+    items = list(data)
+    last_url = links.get('last', {}).get('url')
+    if not last_url:
+        return status, items
+    last_page = int(parse_qs(urlparse(last_url).query).get('page', ['1'])[0])
+    pages = await asyncio.gather(*(
+        _async_cached_get(session, sem, url, headers, {**params, 'page': page}, ttl)
+        for page in range(2, last_page + 1)
+    ))
+    for page_status, page_data, _ in pages:
+        if page_status == 200:
+            items.extend(page_data)
+        elif status == 200:
+            status = page_status
+    return status, items
+
+async def _async_get_listings(listings, ttl=CACHE_TTL):
+    sem = asyncio.Semaphore(ASYNC_CONCURRENCY)
+    async with _async_session() as session:
+        return await asyncio.gather(*(fetch_all_pages(session, sem, *listing, ttl) for listing in listings))
+
+async def _async_dockerhub_page(session, sem, url, headers=None):
+    await asyncio.to_thread(_DOCKER_BUCKET.acquire)
+    async with sem:
+        async with session.get(url, headers=headers) as r:
+            wait = _rate_limit_wait(r.headers)
+            status = r.status
+            data = await r.json() if status == 200 else await r.text()
+        if wait:
+            await asyncio.sleep(wait)
+    return status, data
+
+async def _async_dockerhub_pages(page_url, headers=None):
+    """Fetch page 1 of a Docker Hub listing, then every remaining page concurrently from its count"""
+    sem = asyncio.Semaphore(TAG_WORKERS)
+    async with _async_session() as session:
+        first = await _async_dockerhub_page(session, sem, page_url(1), headers)
+        if first[0] != 200 or not first[1].get("next"):
+            return [first]
+        total_pages = math.ceil(first[1].get("count", 0) / DOCKERHUB_PAGE_SIZE)
+        rest = await asyncio.gather(*(
+            _async_dockerhub_page(session, sem, page_url(page), headers)
+            for page in range(2, total_pages + 1)
+        ))
+    return [first, *rest]
+
 # ------------------------
 # GitHub functions
 # ------------------------
 
-def get_user_repos(token):
+GITHUB_COLUMNS = (
+    "DetectorName", "DetectorDescription", "Verified", "RawSecret", "Repository",
+    "Commit", "File", "Line", "Link", "Email", "Timestamp",
+)
+
+def parse_github_finding(finding: dict) -> tuple:
+    """Flatten a finding into a row ordered like GITHUB_COLUMNS, with None for missing fields"""
+    get = finding.get
+    meta = get("SourceMetadata", _EMPTY).get("Data", _EMPTY).get("Github", _EMPTY).get
+    return (
+        get("DetectorName"),
+        get("DetectorDescription"),
+        get("Verified"),
+        get("Raw"),
+        meta("repository"),
+        meta("commit"),
+        meta("file"),
+        meta("line"),
+        meta("link"),
+        meta("email"),
+        meta("timestamp"),
+    )
+
+def get_all_pages(url, headers=None, params=None, ttl=CACHE_TTL):
+    """Fetch every page of a GitHub listing, returning the first failing page status with the pages that loaded"""
+    params = dict(params or {})
+    status, data, links = _cached_get(url, headers, params, ttl)
+    if status != 200:
+        return status, []
+    items = list(data)
+    last_url = links.get('last', {}).get('url')
+    if not last_url:
+        return status, items
+    last_page = int(parse_qs(urlparse(last_url).query).get('page', ['1'])[0])
+    with ThreadPoolExecutor(max_workers=PAGE_WORKERS) as ex:
+        pages = ex.map(lambda page: _cached_get(url, headers, {**params, 'page': page}, ttl), range(2, last_page + 1))
+        for page_status, page_data, _ in pages:
+            if page_status == 200:
+                items.extend(page_data)
+            elif status == 200:
+                status = page_status
+    return status, items
+
+def get_listings(listings, ttl=CACHE_TTL, async_http=False):
+    """Fetch every page of each (url, headers, params) listing, over one event loop with async_http"""
+    if async_http:
+        return asyncio.run(_async_get_listings(listings, ttl))
+    with ThreadPoolExecutor(max_workers=PROFILE_WORKERS) as ex:
+        return list(ex.map(lambda listing: get_all_pages(*listing, ttl), listings))
+
+def _repo_meta(data):
+    """Map a repo listing to the fields used for filtering, dropping forks"""
+    return [
+        {
+            "url": f"https://github.com/{repo['full_name']}",
+            "size": repo.get('size', 0),
+            "archived": repo.get('archived', False),
+            "disabled": repo.get('disabled', False),
+            "pushed_at": repo.get('pushed_at'),
+        }
+        for repo in data if not repo.get('fork')
+    ]
+
+def _should_scan(meta, min_size=1, skip_archived=False, since=None):
+    """Decide from listing metadata whether a repo is worth a trufflehog run"""
+    if meta["disabled"] or meta["size"] < min_size:
+        return False
+    if skip_archived and meta["archived"]:
+        return False
+    if since and (not meta["pushed_at"] or meta["pushed_at"][:10] < since.isoformat()):
+        return False
+    return True
+
+def get_user_repos(token, ttl=CACHE_TTL):
     headers = {'Authorization': f'token {token}'}
-    repos = []
-    url = 'https://api.github.com/user/repos'
     params = {'per_page': 100, 'type': 'owner'}
-    while url:
-        r = requests.get(url, headers=headers, params=params)
-        if r.status_code != 200:
-            break
-        data = r.json()
-        repos.extend([f"https://github.com/{repo['full_name']}" for repo in data])
-        url = r.links.get('next', {}).get('url')
-        params = None
-    return repos
+    status, data = get_all_pages('https://api.github.com/user/repos', headers, params, ttl)
+    if status != 200:
+        print(f"Failed to fetch my repos: {status}")
+    return _repo_meta(data)
 
-def get_orgs(token):
+def get_orgs(token, ttl=CACHE_TTL):
     headers = {'Authorization': f'token {token}'}
-    orgs = []
-    url = 'https://api.github.com/user/orgs'
-    while url:
-        r = requests.get(url, headers=headers)
-        if r.status_code != 200:
-            break
-        data = r.json()
-        orgs.extend([org['login'] for org in data])
-        url = r.links.get('next', {}).get('url')
-    return orgs
-
-def get_profile_repos(profile_url, token=None):
-    username = urlparse(profile_url).path.strip("/")
-    if not username:
-        print(f"Invalid profile URL: {profile_url}")
-        return []
+    params = {'per_page': 100}
+    status, data = get_all_pages('https://api.github.com/user/orgs', headers, params, ttl)
+    if status != 200:
+        print(f"Failed to fetch my organizations: {status}")
+    return [org['login'] for org in data]
+
+def get_org_repos(orgs, token, ttl=CACHE_TTL, async_http=False):
+    headers = {'Authorization': f'token {token}'}
+    params = {'per_page': 100}
+    listings = [(f'https://api.github.com/orgs/{org}/repos', headers, params) for org in orgs]
+    repos = []
+    for org, (status, data) in zip(orgs, get_listings(listings, ttl, async_http)):
+        if status != 200:
+            print(f"Failed to fetch repos for organization {org}: {status}")
+        repos.append(_repo_meta(data))
+    return repos
+
+def get_profile_repos(profile_urls, token=None, ttl=CACHE_TTL, async_http=False):
+    usernames = [urlparse(profile_url).path.strip("/") for profile_url in profile_urls]
+    for profile_url, username in zip(profile_urls, usernames):
+        if not username:
+            print(f"Invalid profile URL: {profile_url}")
     headers = {}
     if token:
         headers['Authorization'] = f'token {token}'
-    repos = []
-    url = f'https://api.github.com/users/{username}/repos'
     params = {'per_page': 100}
-    while url:
-        r = requests.get(url, headers=headers, params=params)
-        if r.status_code != 200:
-            print(f"Failed to fetch repos for {username}: {r.status_code}")
-            break
-        data = r.json()
-        repos.extend([f"https://github.com/{repo['full_name']}" for repo in data])
-        url = r.links.get('next', {}).get('url')
-        params = None
+    listings = [(f'https://api.github.com/users/{username}/repos', headers, params) for username in usernames if username]
+    results = iter(get_listings(listings, ttl, async_http))
+    repos = []
+    for username in usernames:
+        if not username:
+            repos.append([])
+            continue
+        status, data = next(results)
+        if status != 200:
+            print(f"Failed to fetch repos for {username}: {status}")
+        repos.append(_repo_meta(data))
     return repos
 
-def scan_my_repos_and_orgs(token):
+def scan_my_repos_and_orgs(token, workers=DEFAULT_JOBS, batch_size=1, should_scan=_should_scan,
+                           cache_ttl=CACHE_TTL, async_http=False):
     print("=== STEP 1: Fetching my repositories and organizations ===")
-    repos = get_user_repos(token)
-    orgs = get_orgs(token)
+    user_repos = get_user_repos(token, cache_ttl)
+    repos = [meta["url"] for meta in user_repos]
+    orgs = get_orgs(token, cache_ttl)
     with open('personal.txt', 'w') as f:
         if repos:
             f.write('\n'.join(sorted(repos)))
@@ -118,49 +542,41 @@ def scan_my_repos_and_orgs(token):
             f.write('\n'.join(sorted(orgs)))
         else:
             f.write("No organizations found.")
-    all_output = []
-    for org in orgs:
-        print(f"Scanning organization: {org}")
-        cmd = ['trufflehog', 'github', f'--org={org}', f'--token={token}', '--json']
-        all_output.append(run_trufflehog(cmd))
-    for repo in repos:
-        print(f"Scanning repository: {repo}")
-        cmd = ['trufflehog', 'github', f'--repo={repo}', f'--token={token}', '--json']
-        all_output.append(run_trufflehog(cmd))
-    return all_output
-
-def scan_other_repos(file_path):
+    # Scan each repo once, even when it is reachable both personally and through an org
+    targets = {meta["url"]: "personal" for meta in user_repos if should_scan(meta)}
+    for org, org_repos in zip(orgs, get_org_repos(orgs, token, cache_ttl, async_http)):
+        for meta in org_repos:
+            if should_scan(meta):
+                targets.setdefault(meta["url"], org)
+    from_orgs = sum(origin != "personal" for origin in targets.values())
+    print(f"Scanning {len(targets)} unique repositories ({len(targets) - from_orgs} personal, {from_orgs} from organizations)")
+    return run_trufflehog_pool(github_repo_jobs(list(targets), token, batch_size), workers)
+
+def scan_other_repos(file_path, workers=DEFAULT_JOBS, batch_size=1):
     with open(file_path, "r") as f:
         repos = [line.strip() for line in f if line.strip()]
-    all_output = []
-    for repo in repos:
-        print(f"Scanning repository: {repo}")
-        cmd = ['trufflehog', 'github', f'--repo={repo}', '--json']
-        all_output.append(run_trufflehog(cmd))
-    return all_output
-
-def scan_profile_repos(file_path, token=None):
+    return run_trufflehog_pool(github_repo_jobs(repos, batch_size=batch_size), workers)
+
+def scan_profile_repos(file_path, token=None, workers=DEFAULT_JOBS, batch_size=1, should_scan=_should_scan,
+                       cache_ttl=CACHE_TTL, async_http=False):
     with open(file_path, "r") as f:
         profiles = [line.strip() for line in f if line.strip()]
     all_repos = []
-    for profile in profiles:
-        repos = get_profile_repos(profile, token)
-        print(f"Profile {profile} has {len(repos)} repos")
+    for profile, repos in zip(profiles, get_profile_repos(profiles, token, cache_ttl, async_http)):
+        repos = [meta["url"] for meta in repos if should_scan(meta)]
+        print(f"Profile {profile} has {len(repos)} repos to scan")
         all_repos.extend(repos)
-    all_output = []
-    for repo in all_repos:
-        print(f"Scanning repository: {repo}")
-        cmd = ['trufflehog', 'github', f'--repo={repo}', '--json']
-        all_output.append(run_trufflehog(cmd))
-    return all_output
+    return run_trufflehog_pool(github_repo_jobs(all_repos, batch_size=batch_size), workers)
 
 # ------------------------
 # Docker functions
 # ------------------------
 
+_DOCKER_BUCKET = TokenBucket(DOCKER_RATE, DOCKER_BURST)
+
 def get_docker_token(username: str, password: str) -> str:
     url = "https://hub.docker.com/v2/users/login/"
-    r = requests.post(url, headers={"Content-Type": "application/json"}, json={"username": username, "password": password})
+    r = _SESSION.post(url, headers={"Content-Type": "application/json"}, json={"username": username, "password": password})
     if r.status_code != 200:
         print(f"Login failed: {r.status_code} {r.text}")
         sys.exit(1)
@@ -171,12 +587,20 @@ def get_username_from_url(url: str) -> str:
         return url.rstrip("/").split("/u/")[-1]
     return url.strip()
 
-def list_repositories(username: str, token: str):
+def list_repositories(username: str, token: str, async_http=False):
     repos = []
     url = f"https://hub.docker.com/v2/repositories/{username}/"
     headers = {"Authorization": f"JWT {token}"}
+    if async_http:
+        pages = asyncio.run(_async_dockerhub_pages(lambda page: f"{url}?page_size={DOCKERHUB_PAGE_SIZE}&page={page}", headers))
+        for status, data in pages:
+            if status != 200:
+                print(f"Error fetching repositories: {status} {data}")
+                sys.exit(1)
+            repos.extend(repo["name"] for repo in data.get("results", []))
+        return repos
     while url:
-        r = requests.get(url, headers=headers)
+        r = _SESSION.get(url, headers=headers)
         if r.status_code != 200:
             print(f"Error fetching repositories: {r.status_code} {r.text}")
             sys.exit(1)
@@ -187,107 +611,173 @@ def list_repositories(username: str, token: str):
     return repos
 
 def dockerhub_tag_endpoint(name, page):
-    return f"https://hub.docker.com/v2/repositories/{name}/tags?page_size=100&page={page}"
+    return f"https://hub.docker.com/v2/repositories/{name}/tags?page_size={DOCKERHUB_PAGE_SIZE}&page={page}"
 
 def skip_tag(tag_name):
-    deny_list = [".sig", ".enc"]
-    return any(tag_name.endswith(t) for t in deny_list)
+    return tag_name.endswith(SKIP_TAG_SUFFIXES)
 
 def get_container_tag_page(name, page):
     url = dockerhub_tag_endpoint(name, page)
-    response = requests.get(url)
+    _DOCKER_BUCKET.acquire()
+    response = _SESSION.get(url)
+    _respect_rate_limit(response)
+    if response.status_code != 200:
+        print(f"Error fetching tags for {name} (page {page}): {response.status_code} {response.text}")
+        sys.exit(1)
     return response.json()
 
-def get_container_tags(name):
-    page = 1
-    while True:
-        response = get_container_tag_page(name, page)
-        results = response.get("results", [])
-        for result in results:
-            yield result
-        if not response.get("next"):
-            break
-        page += 1
+def get_container_tags(name, async_http=False):
+    if async_http:
+        pages = asyncio.run(_async_dockerhub_pages(lambda page: dockerhub_tag_endpoint(name, page)))
+        for status, data in pages:
+            if status != 200:
+                print(f"Error fetching tags for {name}: {status} {data}")
+                sys.exit(1)
+            yield from data.get("results", [])
+        return
+    first = get_container_tag_page(name, 1)
+    yield from first.get("results", [])
+    if not first.get("next"):
+        return
+    total_pages = math.ceil(first.get("count", 0) / DOCKERHUB_PAGE_SIZE)
+    with ThreadPoolExecutor(max_workers=TAG_WORKERS) as ex:
+        for response in ex.map(lambda page: get_container_tag_page(name, page), range(2, total_pages + 1)):
+            yield from response.get("results", [])
 
 def scan_with_trufflehog(image: str):
+    """Yield findings for image as trufflehog reports them"""
     try:
-        result = subprocess.run(
+        proc = subprocess.Popen(
             ["trufflehog", "docker", "--image", image, "--json", "--only-verified", "--no-update"],
             stdout=subprocess.PIPE,
             stderr=subprocess.DEVNULL,
-            text=True,
-            check=False
         )
-        findings = []
-        for line in result.stdout.strip().split("\n"):
-            if line.strip():
-                try:
-                    findings.append(json.loads(line))
-                except json.JSONDecodeError:
-                    continue
-        return findings
     except Exception as e:
         print(f"Error scanning {image}: {e}")
-        return []
-
-def parse_docker_finding(image: str, finding: dict) -> dict:
-    docker_meta = finding.get("SourceMetadata", {}).get("Data", {}).get("Docker", {})
-    extra = finding.get("ExtraData") or {}
-    return {
-        "image": docker_meta.get("image", image),
-        "tag": docker_meta.get("tag", ""),
-        "layer": docker_meta.get("layer", ""),
-        "file": docker_meta.get("file", ""),
-        "detector_name": finding.get("DetectorName", ""),
-        "detector_type": finding.get("DetectorType", ""),
-        "detector_desc": finding.get("DetectorDescription", ""),
-        "raw": finding.get("Raw", ""),
-        "redacted": finding.get("Redacted", ""),
-        "verified": finding.get("Verified", False),
-        "rotation_guide": extra.get("rotation_guide", ""),
-        "version": extra.get("version", "")
-    }
+        return
+    with proc.stdout:
+        for line in proc.stdout:
+            if not line.strip():
+                continue
+            try:
+                finding = orjson.loads(line)
+            except orjson.JSONDecodeError:
+                continue
+            yield finding
+    proc.wait()
+
+def _enumerate_images(repos, all_tag, image_q, consumers, async_http=False):
+    """Queue (repo, image) pairs to scan, then one None sentinel per consumer"""
+    try:
+        for full_repo in repos:
+            if not all_tag:
+                image_q.put((full_repo, f"{full_repo}:latest"))
+                continue
+            print(f"\n[+] Listing tags for repository: {full_repo}")
+            for tag in get_container_tags(full_repo, async_http):
+                if skip_tag(tag["name"]):
+                    continue
+                for img in tag.get("images", []):
+                    image_q.put((full_repo, f"{full_repo}@{img['digest']}"))
+    finally:
+        for _ in range(consumers):
+            image_q.put(None)
+
+def _scan_images(image_q, all_tag):
+    findings = []
+    try:
+        while (item := image_q.get()) is not None:
+            full_repo, image = item
+            print(f"[+] Scanning image: {image}")
+            if all_tag:
+                _DOCKER_BUCKET.acquire()
+            for f in scan_with_trufflehog(image):
+                findings.append(parse_docker_finding(full_repo, f))
+    except BaseException:
+        # Keep draining so the producer never blocks on a full queue
+        while image_q.get() is not None:
+            pass
+        raise
+    return findings
+
+def scan_docker_repos(repos, all_tag=False, workers=DEFAULT_JOBS, async_http=False):
+    """Scan Docker repos, overlapping tag enumeration with a pool of trufflehog scans"""
+    require_trufflehog()
+    image_q = queue.Queue(maxsize=TAG_QUEUE_SIZE)
+    with ThreadPoolExecutor(max_workers=workers + 1) as ex:
+        producer = ex.submit(_enumerate_images, repos, all_tag, image_q, workers, async_http)
+        consumers = [ex.submit(_scan_images, image_q, all_tag) for _ in range(workers)]
+        findings = [finding for future in consumers for finding in future.result()]
+        # Re-raise listing failures rather than reporting a partial scan as complete
+        producer.result()
+    return findings
+
+DOCKER_COLUMNS = (
+    "image", "tag", "layer", "file", "detector_name", "detector_type",
+    "detector_desc", "raw", "redacted", "verified", "rotation_guide", "version",
+)
+
+def parse_docker_finding(image: str, finding: dict) -> tuple:
+    """Flatten a finding into a row ordered like DOCKER_COLUMNS, with None for missing fields"""
+    get = finding.get
+    meta = get("SourceMetadata", _EMPTY).get("Data", _EMPTY).get("Docker", _EMPTY).get
+    extra = (get("ExtraData") or _EMPTY).get
+    return (
+        meta("image", image),
+        meta("tag"),
+        meta("layer"),
+        meta("file"),
+        get("DetectorName"),
+        get("DetectorType"),
+        get("DetectorDescription"),
+        get("Raw"),
+        get("Redacted"),
+        get("Verified", False),
+        extra("rotation_guide"),
+        extra("version"),
+    )
 
 # ------------------------
 # Excel export
 # ------------------------
 
-def save_to_excel_github(results_file, output_file):
-    rows = []
-    with open(results_file, "r") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            try:
-                data = json.loads(line)
-                github_data = data.get("SourceMetadata", {}).get("Data", {}).get("Github", {})
-                rows.append({
-                    "DetectorName": data.get("DetectorName", ""),
-                    "DetectorDescription": data.get("DetectorDescription", ""),
-                    "Verified": data.get("Verified", ""),
-                    "RawSecret": data.get("Raw", ""),
-                    "Repository": github_data.get("repository", ""),
-                    "Commit": github_data.get("commit", ""),
-                    "File": github_data.get("file", ""),
-                    "Line": github_data.get("line", ""),
-                    "Link": github_data.get("link", ""),
-                    "Email": github_data.get("email", ""),
-                    "Timestamp": github_data.get("timestamp", ""),
-                })
-            except json.JSONDecodeError:
-                continue
+def write_rows(columns, rows, output_file):
+    """Write rows as Parquet for .parquet outputs, otherwise stream them into an xlsx"""
+    if output_file.lower().endswith(".parquet"):
+        import pandas as pd
+        pd.DataFrame.from_records(rows, columns=columns).to_parquet(output_file, compression="zstd", index=False)
+        return
+    # Findings are raw secrets: keep them as literal text, never as formulas or hyperlinks
+    wb = xlsxwriter.Workbook(output_file, {"constant_memory": True, "strings_to_urls": False, "strings_to_formulas": False})
+    ws = wb.add_worksheet()
+    ws.write_row(0, 0, columns)
+    truncated = 0
+    for i, row in enumerate(rows, 1):
+        for j, value in enumerate(row):
+            if isinstance(value, (dict, list)):
+                value = orjson.dumps(value).decode()
+            error = ws.write(i, j, value)
+            if error == -2:
+                truncated += 1
+            elif error:
+                print(f"{YELLOW}Warning: {output_file} is full after {i - 1} findings; "
+                      f"{len(rows) - i + 1} not written (use a .parquet output instead){RESET}")
+                wb.close()
+                return
+    wb.close()
+    if truncated:
+        print(f"{YELLOW}Warning: {truncated} cells exceeded Excel's 32767 character limit and were truncated{RESET}")
+
+def save_to_excel_github(rows, output_file):
     if rows:
-        df = pd.DataFrame(rows)
-        df.to_excel(output_file, index=False)
+        write_rows(GITHUB_COLUMNS, rows, output_file)
         print(f"Parsed GitHub results saved to {output_file} ({len(rows)} findings)")
     else:
         print("No valid GitHub JSON found, Excel not created.")
 
 def save_to_excel_docker(findings, output_file):
     if findings:
-        df = pd.DataFrame(findings)
-        df.to_excel(output_file, index=False)
+        write_rows(DOCKER_COLUMNS, findings, output_file)
         print(f"Parsed Docker results saved to {output_file} ({len(findings)} findings)")
     else:
         print("No Docker findings, Excel not created.")
@@ -296,6 +786,15 @@ def save_to_excel_docker(findings, output_file):
 # Main
 # ------------------------
 
+def positive_int(value):
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: {value!r}")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
 def main():
     parser = argparse.ArgumentParser(description="TruffleHog combined GitHub + Docker scanner")
     group = parser.add_mutually_exclusive_group(required=True)
@@ -305,37 +804,48 @@ def main():
     group.add_argument("--docker-profile", help="Scan all Docker repos under profile")
     group.add_argument("--docker-repo", help="Scan Docker repos from file")
     parser.add_argument("-f", "--file", help="File with list of repos/profiles")
-    parser.add_argument("-o", "--output", help="Excel output filename", default="output.xlsx")
+    parser.add_argument("-o", "--output", help="Output filename (.xlsx, or .parquet)", default="output.xlsx")
     parser.add_argument("--all-tag", action="store_true", help="Scan all tags (Docker only)")
+    parser.add_argument("-j", "--jobs", type=positive_int, default=DEFAULT_JOBS, help=f"Parallel trufflehog processes (default: {DEFAULT_JOBS})")
+    parser.add_argument("--batch-size", type=positive_int, default=1, help="GitHub repos passed to a single trufflehog process (default: 1)")
+    parser.add_argument("--min-size", type=int, default=1, help="Skip GitHub repos smaller than this many KB (default: 1, skips empty repos)")
+    parser.add_argument("--skip-archived", action="store_true", help="Skip archived GitHub repos")
+    parser.add_argument("--since", type=date.fromisoformat, help="Skip GitHub repos not pushed to since YYYY-MM-DD")
+    parser.add_argument("--cache-ttl", type=int, default=CACHE_TTL, help=f"Seconds to reuse cached GitHub listings (default: {CACHE_TTL})")
+    parser.add_argument("--no-cache", action="store_true", help="Always fetch GitHub listings from the API")
+    parser.add_argument("--async", dest="async_http", action="store_true", help="Fetch GitHub and Docker Hub listings with aiohttp")
     args = parser.parse_args()
 
+    cache_ttl = 0 if args.no_cache else args.cache_ttl
+    if args.async_http:
+        _aiohttp()
+    should_scan = partial(_should_scan, min_size=args.min_size, skip_archived=args.skip_archived, since=args.since)
+
     github_token, docker_user, docker_pass = read_credentials()
 
-    all_output = []
-    docker_findings = []
+    github_rows = None
 
     # ---------------- GitHub modes ----------------
     if args.git_me:
         if not github_token:
             print("GitHub token not found in cred.conf")
             sys.exit(1)
-        all_output = scan_my_repos_and_orgs(github_token)
+        github_rows = scan_my_repos_and_orgs(github_token, args.jobs, args.batch_size, should_scan,
+                                             cache_ttl, args.async_http)
     elif args.git_other:
         if not args.file:
             print("Error: --git-other requires -f <repos.txt>")
             sys.exit(1)
-        all_output = scan_other_repos(args.file)
+        github_rows = scan_other_repos(args.file, args.jobs, args.batch_size)
     elif args.git_profile:
         if not args.file:
             print("Error: --git-profile requires -f <profile.txt>")
             sys.exit(1)
-        all_output = scan_profile_repos(args.file, github_token)
+        github_rows = scan_profile_repos(args.file, github_token, args.jobs, args.batch_size, should_scan,
+                                         cache_ttl, args.async_http)
 
-    if all_output:
-        with open("results.txt", "w") as f:
-            f.write("\n".join(all_output))
-        if args.output:
-            save_to_excel_github("results.txt", args.output)
+    if github_rows is not None and args.output:
+        save_to_excel_github(github_rows, args.output)
 
     # ---------------- Docker modes ----------------
     if args.docker_profile or args.docker_repo:
@@ -347,7 +857,7 @@ def main():
             with open(args.docker_profile, "r") as f:
                 profile_url = f.read().strip()
             username = get_username_from_url(profile_url)
-            repos = list_repositories(username, token)
+            repos = list_repositories(username, token, args.async_http)
             repos = [f"{username}/{r}" for r in repos]
         else:
             with open(args.docker_repo, "r") as f:
@@ -358,25 +868,7 @@ def main():
                 out.write(f"{repo}\n")
         print(f"Saved {len(repos)} repositories to image.txt")
 
-        for full_repo in repos:
-            print(f"\n[+] Scanning repository: {full_repo}")
-            if args.all_tag:
-                for tag in get_container_tags(full_repo):
-                    tag_name = tag["name"]
-                    if skip_tag(tag_name):
-                        continue
-                    for img in tag.get("images", []):
-                        digest = img["digest"]
-                        image_digest = f"{full_repo}@{digest}"
-                        findings = scan_with_trufflehog(image_digest)
-                        for f in findings:
-                            docker_findings.append(parse_docker_finding(full_repo, f))
-                        sleep(0.5)
-            else:
-                image = f"{full_repo}:latest"
-                findings = scan_with_trufflehog(image)
-                for f in findings:
-                    docker_findings.append(parse_docker_finding(full_repo, f))
+        docker_findings = scan_docker_repos(repos, args.all_tag, args.jobs, args.async_http)
 
         if args.output:
             save_to_excel_docker(docker_findings, args.output)